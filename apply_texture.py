@@ -1,8 +1,11 @@
 import bpy
+import argparse
 import os
+import sys
+from mathutils import Vector
 
 # -----------------------------------------------------------------------------
-# EDIT THESE VALUES
+# EDIT THESE VALUES (or pass --texture / --output after Blender's `--`)
 # -----------------------------------------------------------------------------
 # 1. The FULL, absolute path to your texture image.
 TEXTURE_FILE_PATH = "/home/janga/Downloads/yerba-mate/source/Scaniverse/Scaniverse.jpg"
@@ -11,78 +14,100 @@ TEXTURE_FILE_PATH = "/home/janga/Downloads/yerba-mate/source/Scaniverse/Scaniver
 OUTPUT_GLB_PATH = "/home/janga/YOLO/models/yerba_mate_FINAL.glb"
 # -----------------------------------------------------------------------------
 
+# HOW TO RUN (one scan):
+#   blender --background scan.blend --python apply_texture.py -- --texture tex.jpg --output out.glb
+# For a whole directory of scans see apply_texture_batch.py.
+
 
 # --- SCRIPT LOGIC (No need to edit below here) ---
 
-print("Starting command-line texture and export script...")
+def parse_args():
+    """Parse the args after Blender's `--` separator."""
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(description="Apply a texture to the scan's mesh and export a packed .glb")
+    parser.add_argument('--texture', default=TEXTURE_FILE_PATH, help='texture image to apply')
+    parser.add_argument('--output', default=OUTPUT_GLB_PATH, help='.glb file to write')
+    return parser.parse_args(argv)
+
+
+def main(texture_path, output_path):
+    """Texture the first mesh in the open file and export it. Returns True on success."""
+    print("Starting command-line texture and export script...")
+
+    # Find the first imported MESH object.
+    # This is more robust than guessing the name.
+    obj = next((o for o in bpy.data.objects if o.type == 'MESH'), None)
+
+    if obj is None:
+        print("ERROR: No mesh object found in the file. Quitting.")
+        return False
 
-# Find the first imported MESH object.
-# This is more robust than guessing the name.
-obj = next((o for o in bpy.data.objects if o.type == 'MESH'), None)
+    print(f"Found object: '{obj.name}'")
 
-if obj is None:
-    print("ERROR: No mesh object found in the file. Quitting.")
-    bpy.ops.wm.quit_blender()
+    # Find the first material on that object.
+    if not obj.material_slots:
+        print(f"ERROR: Object '{obj.name}' has no material slots. Quitting.")
+        return False
 
-print(f"Found object: '{obj.name}'")
+    mat = obj.material_slots[0].material
+    if mat is None:
+        print(f"ERROR: No material found in the first slot of '{obj.name}'. Quitting.")
+        return False
 
-# Find the first material on that object.
-if not obj.material_slots:
-    print(f"ERROR: Object '{obj.name}' has no material slots. Quitting.")
-    bpy.ops.wm.quit_blender()
+    print(f"Found material: '{mat.name}'")
 
-mat = obj.material_slots[0].material
-if mat is None:
-    print(f"ERROR: No material found in the first slot of '{obj.name}'. Quitting.")
-    bpy.ops.wm.quit_blender()
+    # Ensure the material uses nodes
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
 
-print(f"Found material: '{mat.name}'")
+    # Find the main shader node
+    principled_node = nodes.get("Principled BSDF")
+    if principled_node is None:
+        # Sometimes it's named differently, let's find it by type
+        principled_node = next((n for n in nodes if n.type == 'BSDF_PRINCIPLED'), None)
 
-# Ensure the material uses nodes
-mat.use_nodes = True
-nodes = mat.node_tree.nodes
-links = mat.node_tree.links
+    if principled_node is None:
+        print("ERROR: Could not find the main 'Principled BSDF' shader node. Quitting.")
+        return False
 
-# Find the main shader node
-principled_node = nodes.get("Principled BSDF")
-if principled_node is None:
-    # Sometimes it's named differently, let's find it by type
-    principled_node = next((n for n in nodes if n.type == 'BSDF_PRINCIPLED'), None)
+    # Load the image
+    print(f"Loading texture from: {texture_path}")
+    if not os.path.exists(texture_path):
+        print(f"ERROR: Texture file not found at '{texture_path}'. Check the path.")
+        return False
 
-if principled_node is None:
-    print("ERROR: Could not find the main 'Principled BSDF' shader node. Quitting.")
-    bpy.ops.wm.quit_blender()
+    # Create an Image Texture node
+    tex_image_node = nodes.new(type='ShaderNodeTexImage')
+    tex_image_node.location = principled_node.location - Vector((300, 0))
+    tex_image_node.image = bpy.data.images.load(texture_path)
 
-# Create an Image Texture node
-tex_image_node = nodes.new(type='ShaderNodeTexImage')
-tex_image_node.location = principled_node.location - Vector((300, 0))
+    # Link the nodes together
+    print(f"Connecting '{tex_image_node.name}' to '{principled_node.name}'...")
+    links.new(tex_image_node.outputs['Color'], principled_node.inputs['Base Color'])
 
-# Load the image
-print(f"Loading texture from: {TEXTURE_FILE_PATH}")
-if not os.path.exists(TEXTURE_FILE_PATH):
-    print(f"ERROR: Texture file not found at '{TEXTURE_FILE_PATH}'. Check the path.")
-    bpy.ops.wm.quit_blender()
-    
-tex_image_node.image = bpy.data.images.load(TEXTURE_FILE_PATH)
+    # --- EXPORT THE FINAL MODEL ---
+    print(f"Exporting packed .glb file to: {output_path}")
 
-# Link the nodes together
-print(f"Connecting '{tex_image_node.name}' to '{principled_node.name}'...")
-links.new(tex_image_node.outputs['Color'], principled_node.inputs['Base Color'])
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
 
-# --- EXPORT THE FINAL MODEL ---
-print(f"Exporting packed .glb file to: {OUTPUT_GLB_PATH}")
+    # Select only our target object for export
+    bpy.ops.object.select_all(action='DESELECT')
+    obj.select_set(True)
 
-output_dir = os.path.dirname(OUTPUT_GLB_PATH)
-os.makedirs(output_dir, exist_ok=True)
+    bpy.ops.export_scene.gltf(
+        filepath=output_path,
+        export_format='GLB',
+        use_selection=True
+    )
 
-# Select only our target object for export
-bpy.ops.object.select_all(action='DESELECT')
-obj.select_set(True)
+    print(f"\n✅ DONE. Command-line process complete. '{os.path.basename(output_path)}' has been created.")
+    return True
 
-bpy.ops.export_scene.gltf(
-    filepath=OUTPUT_GLB_PATH,
-    export_format='GLB',
-    use_selection=True
-)
 
-print("\n✅ DONE. Command-line process complete. 'yerba_mate_FINAL.glb' has been created.")
+if __name__ == '__main__':
+    args = parse_args()
+    if not main(args.texture, args.output):
+        sys.exit(1)
@@ -0,0 +1,96 @@
+"""
+apply_texture_batch.py — Run apply_texture.py over a whole directory of scans
+-----------------------------------------------------------------------------
+Finds every .blend scan under --input-dir and pairs it with a .jpg/.jpeg
+texture from the same folder: the one with the same name, or the folder's
+only texture. Scans with no texture, or with several textures and none
+matching by name, are skipped with a warning. Each scan is exported to
+<output-dir>/<same relative folder>/<scan name>.glb, so scans with the same
+name in different folders don't overwrite each other. Blender's Python is
+single-threaded, so the speed-up comes from running several headless Blender
+processes at once.
+
+HOW TO RUN:
+  python apply_texture_batch.py --input-dir scans/ --output-dir models/
+"""
+
+import argparse
+import os
+import subprocess
+from multiprocessing import Pool
+
+BLENDER_BIN = "blender"
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "apply_texture.py")
+TEXTURE_EXTS = ('.jpg', '.jpeg')
+
+
+def find_jobs(input_dir, output_dir):
+    """Return (scan .blend, texture, output .glb) for every scan with an unambiguous texture."""
+    jobs = []
+    for root, _, files in os.walk(input_dir):
+        textures = sorted(f for f in files if f.lower().endswith(TEXTURE_EXTS))
+        out_root = os.path.join(output_dir, os.path.relpath(root, input_dir))
+        for blend in sorted(f for f in files if f.lower().endswith('.blend')):
+            scan = os.path.join(root, blend)
+            stem = os.path.splitext(blend)[0]
+            same_name = [t for t in textures if os.path.splitext(t)[0] == stem]
+            if same_name:
+                tex = same_name[0]
+            elif len(textures) == 1:
+                tex = textures[0]
+            else:
+                reason = 'no texture found next to it' if not textures else \
+                    f'{len(textures)} textures next to it and none named {stem}.*'
+                print(f"❌ {scan} — {reason}, skipping")
+                continue
+            jobs.append((
+                scan,
+                os.path.join(root, tex),
+                os.path.normpath(os.path.join(out_root, f"{stem}.glb")),
+            ))
+    return jobs
+
+
+def run_job(job):
+    """Run apply_texture.py in its own headless Blender; return (scan, success, Blender's output)."""
+    scan, tex, out = job
+    result = subprocess.run(
+        # Blender exits 0 when a --python script raises unless told otherwise
+        [BLENDER_BIN, '--background', scan, '--python-exit-code', '1', '--python', SCRIPT,
+         '--', '--texture', tex, '--output', out],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    return scan, result.returncode == 0, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input-dir', required=True, help='directory tree containing .blend scans')
+    parser.add_argument('--output-dir', required=True, help='where to write the exported .glb files')
+    parser.add_argument('--processes', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='number of Blender processes to run at once')
+    args = parser.parse_args()
+
+    jobs = find_jobs(args.input_dir, args.output_dir)
+    if not jobs:
+        raise SystemExit(f"No textured .blend scans found in {args.input_dir}")
+    # apply_texture.py creates each output's folder itself
+
+    failed = []
+    with Pool(processes=args.processes) as pool:
+        for scan, ok, output in pool.imap_unordered(run_job, jobs):
+            print(f"{'✅' if ok else '❌'} {os.path.basename(scan)}")
+            if not ok:
+                # Show why: apply_texture.py's ERROR lines or the Python traceback
+                print(output.rstrip())
+                failed.append(scan)
+
+    print(f"\nDONE — {len(jobs) - len(failed)}/{len(jobs)} scans exported to {args.output_dir}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
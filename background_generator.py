@@ -1,4 +1,5 @@
-import os, requests
+import os, shutil, requests
+from concurrent.futures import ThreadPoolExecutor
 
 urls = [
     "https://upload.wikimedia.org/wikipedia/commons/0/08/Kitchen_Background_1.jpg",
@@ -6,16 +7,35 @@ urls = [
     # …add more links if you like
 ]
 
+MAX_WORKERS = 16
+
 headers = {"User-Agent": "Mozilla/5.0 (DataGenBot/1.0)"}
 os.makedirs("backgrounds", exist_ok=True)
 
-for i, url in enumerate(urls):
+# One shared session so keep-alive connections are reused across downloads
+sess = requests.Session()
+adapter = requests.adapters.HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+sess.mount("https://", adapter)
+sess.mount("http://", adapter)
+
+
+def fetch(item):
+    i, url = item
+    path = f"backgrounds/bg_{i}.jpg"
+    part = path + ".part"  # only renamed into place once the body fully arrived
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-        r.raise_for_status()
-        with open(f"backgrounds/bg_{i}.jpg", "wb") as f:
-            f.write(r.content)
+        with sess.get(url, headers=headers, timeout=10, stream=True) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            with open(part, "wb") as f:
+                shutil.copyfileobj(r.raw, f)
+        os.replace(part, path)
         print(f"✅ bg_{i}.jpg")
     except Exception as e:
+        if os.path.exists(part):
+            os.remove(part)
         print(f"❌ {url.split('/')[-1]} — {e}")
 
+
+with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+    list(ex.map(fetch, enumerate(urls)))
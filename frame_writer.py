@@ -0,0 +1,58 @@
+"""
+frame_writer.py — Image / label encoding for generate_blender.py's writer pool
+-----------------------------------------------------------------------------
+Everything here runs on writer threads, so it must not touch bpy: it only
+needs NumPy, the standard library and (for JPEG output) Pillow, all of which
+release the GIL while encoding.
+"""
+
+import os
+import struct
+import zlib
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:  # only required for JPEG output
+    Image = None
+
+
+def write_png(path, rgb, level):
+    """Write an (H, W, 3) uint8 array as an 8-bit RGB PNG at the given zlib level."""
+    h, w, _ = rgb.shape
+    # Each scanline is prefixed with filter type 0 (None)
+    raw = np.hstack([np.zeros((h, 1), dtype=np.uint8), rgb.reshape(h, w * 3)]).tobytes()
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw, level)))
+        f.write(chunk(b'IEND', b''))
+
+
+def write_jpeg(path, rgb, quality):
+    """Write an (H, W, 3) uint8 array as a JPEG."""
+    Image.fromarray(rgb).save(path, quality=quality)
+
+
+def save_frame(pixels, img_path, fmt, jpeg_quality, png_level):
+    """Encode and write one float RGBA frame copied out of Blender as JPEG or PNG."""
+    # Blender stores rows bottom-up in scene-linear light
+    lin = np.clip(pixels[::-1, :, :3], 0.0, 1.0)
+    srgb = np.where(lin <= 0.0031308, lin * 12.92, 1.055 * np.power(lin, 1 / 2.4) - 0.055)
+    rgb = (srgb * 255 + 0.5).astype(np.uint8)
+    if fmt == 'JPEG':
+        write_jpeg(img_path, rgb, jpeg_quality)
+    else:
+        write_png(img_path, rgb, png_level)
+
+
+def write_labels(lbl_dir, labels):
+    """Write a batch of (base filename, bbox) pairs as YOLO .txt label files."""
+    for base_filename, bbox in labels:
+        with open(os.path.join(lbl_dir, f'{base_filename}.txt'), 'w') as f:
+            f.write(bbox + '\n')
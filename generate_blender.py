@@ -5,12 +5,18 @@ generate_blender.py — Synthetic data generator for a single‑class YOLO datas
 • Loads one or more 3‑D models of objects (OBJ / GLB / GLTF)
 • Randomises camera position, zoom, object scale / pose / location and lighting
 • Composites rendered objects onto random real-world background images
-• Renders PNGs plus YOLO‑formatted labels   (class 0  cx  cy  w  h)
+• Renders JPEGs (or PNGs) plus YOLO‑formatted labels   (class 0  cx  cy  w  h)
 • Compatible with Blender ≥ 2.80 (tested 3.x)
 
 HOW TO RUN (headless):
   blender --background --python generate_blender.py
 
+HOW TO RUN (one shard of K, e.g. one per GPU — see run_parallel.py):
+  blender --background --python generate_blender.py -- --shard 0 --total 4 --engine CYCLES
+
+  `--engine` overrides RENDER_ENGINE. Per-GPU pinning via CUDA_VISIBLE_DEVICES
+  only works with Cycles; Eevee shards all render on the display GPU.
+
 Edit the *CONFIG* section below to point at your model paths and output dir.
 """
 
@@ -29,8 +35,45 @@ OUTPUT_DIR  = "/home/janga/YOLO/output_blender"
 IMAGE_RES   = (640, 640)
 CLASS_ID    = 0
 
+# Render engine: 'BLENDER_EEVEE' (fast rasterizer, default) or 'CYCLES'
+# (path tracer — slower, use it when a split needs photoreal shading)
+RENDER_ENGINE = 'BLENDER_EEVEE'
+EEVEE_SAMPLES = 16
+CYCLES_SAMPLES = 32          # with adaptive sampling + denoising
+CYCLES_ADAPTIVE_THRESHOLD = 0.01
+
+# Output image format: 'JPEG' (fast to encode, 5–10× smaller on disk — YOLO
+# doesn't mind the artifacts), 'PNG' (lossless), or None to pick JPEG when
+# Pillow is installed into Blender's Python and PNG otherwise. Both are encoded
+# by the writer pool; only an explicit 'JPEG' without Pillow falls back to
+# Blender's own encoder, which runs synchronously on the main thread and stalls
+# rendering for every frame.
+#
+# Deliberate dataset change: frames are colour-managed with the 'Standard' view
+# transform (no look, exposure 0, gamma 1) instead of Blender's default
+# Filmic / AgX, because frame_writer applies a plain sRGB curve. The images
+# are a little more contrasty with harder highlights than datasets rendered
+# before this change, so don't mix the two without retraining.
+OUTPUT_FORMAT = None
+JPEG_QUALITY  = 90
+PNG_ZLIB_LEVEL = 1   # 1 = fastest, 9 = smallest
+
+# Frames are encoded and written by a pool of writer threads (see
+# frame_writer.py) while the next frame is randomised and rendered. NumPy, zlib
+# and Pillow release the GIL, and threads avoid pickling each ~6.5 MB float
+# frame into a worker process (measured ~2× slower than threads per frame).
+# Cap how many finished frames may wait in memory.
+WRITER_WORKERS = 4
+MAX_PENDING_WRITES = 4
+# Labels are buffered in memory and handed to the writer pool in batches of
+# this size; whatever is left at exit is written on the main thread
+LABEL_FLUSH_EVERY = 100
+
 # --- RANDOMIZATION SETTINGS ---
 
+# Set to an int for a reproducible dataset (each shard derives its own stream)
+SEED = None
+
 # ✅ ADJUSTED: Camera is now closer to the object on average
 CAM_RAD_MIN, CAM_RAD_MAX = 0.6, 1.2  # Camera distance from origin (metres)
 CAM_ELEV_MIN, CAM_ELEV_MAX = 10, 50  # Camera elevation (degrees)
@@ -50,11 +93,20 @@ LIGHT_PWR_MIN, LIGHT_PWR_MAX = 800, 1500
 
 # ----------------------------------------------------------------------------
 import bpy
+import bmesh
+import argparse
 import os
-import random
+import sys
 import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
 from mathutils import Vector
-from bpy_extras.object_utils import world_to_camera_view
+
+# Blender doesn't put the script's folder on sys.path; frame_writer lives next to it
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import frame_writer
 
 # ────────────────────────────────────────────────────────────────────────────
 # Utility helpers
@@ -66,15 +118,89 @@ def clean_scene():
         bpy.data.objects.remove(obj, do_unlink=True)
 
 
-def setup_renderer():
+def parse_cli_args():
+    """Return (shard, total, engine) from the args after Blender's `--` separator."""
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(description='Render one shard of the synthetic YOLO dataset')
+    parser.add_argument('--shard', default='0', help='shard index, or the compact `i/N` form')
+    parser.add_argument('--total', type=int, default=None, help='number of shards (default 1)')
+    parser.add_argument('--engine', default=RENDER_ENGINE,
+                        choices=['CYCLES', 'BLENDER_EEVEE', 'BLENDER_EEVEE_NEXT'],
+                        help='render engine (default RENDER_ENGINE)')
+    args = parser.parse_args(argv)
+
+    shard_str, _, total_str = args.shard.partition('/')
+    try:
+        shard = int(shard_str)
+        total = int(total_str) if total_str else 1
+    except ValueError:
+        parser.error(f'--shard must be an integer or i/N, got {args.shard!r}')
+    if args.total is not None:
+        if total_str and args.total != total:
+            parser.error(f'--shard {args.shard} contradicts --total {args.total}')
+        total = args.total
+    if total < 1 or not 0 <= shard < total:
+        parser.error(f'invalid shard {shard}/{total}')
+    return shard, total, args.engine
+
+
+def enable_visible_gpus():
+    """Enable only the CUDA device(s) exposed through CUDA_VISIBLE_DEVICES."""
+    prefs = bpy.context.preferences.addons['cycles'].preferences
+    prefs.compute_device_type = 'CUDA'
+    prefs.get_devices()
+    # CUDA renumbers visible devices from 0, so with CUDA_VISIBLE_DEVICES set
+    # the CUDA entries Cycles reports are exactly the ones this shard owns.
+    for device in prefs.devices:
+        device.use = device.type == 'CUDA'
+
+
+def setup_renderer(engine):
     """Configure renderer settings for performance and output."""
     scn = bpy.context.scene
-    scn.render.engine = 'CYCLES'
-    scn.cycles.device = 'GPU'
+    if engine == 'CYCLES':
+        scn.render.engine = 'CYCLES'
+        scn.cycles.device = 'GPU'
+        if 'CUDA_VISIBLE_DEVICES' in os.environ:
+            enable_visible_gpus()
+        # Adaptive sampling + OIDN matches the old fixed 128 samples for
+        # 640×640 training frames at a fraction of the cost
+        scn.cycles.samples = CYCLES_SAMPLES
+        scn.cycles.use_adaptive_sampling = True
+        scn.cycles.adaptive_threshold = CYCLES_ADAPTIVE_THRESHOLD
+        scn.cycles.use_denoising = True
+        scn.cycles.denoiser = 'OPENIMAGEDENOISE'
+        # Synthetic YOLO data doesn't need cinematic light transport
+        scn.cycles.max_bounces = 4
+        scn.cycles.diffuse_bounces = 2
+        scn.cycles.glossy_bounces = 2
+        # Only transforms and the background change between frames, so keep
+        # the BVH, textures and shaders alive across render() calls
+        scn.render.use_persistent_data = True
+    else:
+        if 'CUDA_VISIBLE_DEVICES' in os.environ:
+            print('WARNING: CUDA_VISIBLE_DEVICES does not pin Eevee to a GPU; '
+                  'all Eevee shards share the display GPU. Use --engine CYCLES.')
+        # Blender 4.2–4.x calls the Eevee engine 'BLENDER_EEVEE_NEXT'
+        try:
+            scn.render.engine = 'BLENDER_EEVEE_NEXT'
+        except TypeError:
+            scn.render.engine = 'BLENDER_EEVEE'
+        scn.eevee.taa_render_samples = EEVEE_SAMPLES
+        if hasattr(scn.eevee, 'use_gtao'):
+            scn.eevee.use_gtao = True
     scn.render.film_transparent = True
-    scn.render.image_settings.file_format = 'PNG'
+    # Only used by save_frame_with_blender() (JPEG without Pillow)
+    scn.render.image_settings.file_format = 'JPEG'
+    scn.render.image_settings.quality = JPEG_QUALITY
     scn.render.resolution_x, scn.render.resolution_y = IMAGE_RES
-    scn.cycles.samples = 128
+    scn.render.resolution_percentage = 100
+    # frame_writer.save_frame() applies a plain sRGB curve, so keep Blender's
+    # view transform at 'Standard' to match it (see the note above OUTPUT_FORMAT)
+    scn.view_settings.view_transform = 'Standard'
+    scn.view_settings.look = 'None'
+    scn.view_settings.exposure = 0.0
+    scn.view_settings.gamma = 1.0
 
 
 def setup_compositor():
@@ -88,20 +214,32 @@ def setup_compositor():
 
     render_layers = tree.nodes.new(type='CompositorNodeRLayers')
     alpha_over = tree.nodes.new(type='CompositorNodeAlphaOver')
-    scale_node = tree.nodes.new(type='CompositorNodeScale')
     image_node = tree.nodes.new(type='CompositorNodeImage')
     composite_node = tree.nodes.new(type='CompositorNodeComposite')
+    viewer_node = tree.nodes.new(type='CompositorNodeViewer')
 
-    scale_node.space = 'RENDER_SIZE'
-
-    tree.links.new(image_node.outputs['Image'], scale_node.inputs['Image'])
-    tree.links.new(scale_node.outputs['Image'], alpha_over.inputs[1])
+    # Backgrounds are pre-scaled to IMAGE_RES by load_backgrounds(), so no Scale node
+    tree.links.new(image_node.outputs['Image'], alpha_over.inputs[1])
     tree.links.new(render_layers.outputs['Image'], alpha_over.inputs[2])
     tree.links.new(alpha_over.outputs['Image'], composite_node.inputs['Image'])
+    # The Viewer node exposes the composited frame to Python (see read_frame_pixels)
+    tree.links.new(alpha_over.outputs['Image'], viewer_node.inputs['Image'])
     
     return image_node
 
 
+def load_backgrounds(paths):
+    """Load every background once, resampled to IMAGE_RES, and keep it alive."""
+    images = []
+    for path in paths:
+        img = bpy.data.images.load(path, check_existing=True)
+        if tuple(img.size) != IMAGE_RES:
+            img.scale(*IMAGE_RES)  # one resample here instead of one per render
+        img.use_fake_user = True  # don't let Blender garbage-collect it
+        images.append(img)
+    return images
+
+
 def ensure_camera():
     """Create a camera if none exists and return it."""
     cams = [o for o in bpy.data.objects if o.type == 'CAMERA']
@@ -114,14 +252,14 @@ def ensure_camera():
     return cam_obj
 
 
-def ensure_light():
-    """Ensure at least one sun and a random fill light exist."""
+def setup_lights(rng):
+    """Ensure a sun exists and create the single fill light; return the fill."""
     for obj in [o for o in bpy.data.objects if o.type == 'LIGHT' and 'Fill' in o.name]:
         bpy.data.objects.remove(obj, do_unlink=True)
 
     if not [o for o in bpy.data.objects if o.type == 'LIGHT' and o.name == 'Sun']:
         sun_data = bpy.data.lights.new('Sun', 'SUN')
-        sun_data.energy = random.uniform(2, 5)
+        sun_data.energy = rng.uniform(2, 5)
         sun = bpy.data.objects.new('Sun', sun_data)
         bpy.context.collection.objects.link(sun)
         sun.location = (5, -5, 5)
@@ -130,8 +268,13 @@ def ensure_light():
     fill_data = bpy.data.lights.new(name='Fill', type='POINT')
     fill = bpy.data.objects.new('Fill', fill_data)
     bpy.context.collection.objects.link(fill)
-    fill.data.energy = random.uniform(LIGHT_PWR_MIN, LIGHT_PWR_MAX)
-    fill.location = (random.uniform(-4, 4), random.uniform(-4, 4), random.uniform(1, 4))
+    return fill
+
+
+def randomise_light(fill, params, i):
+    """Apply frame i's fill light power and position (no datablocks are created)."""
+    fill.data.energy = params['light_energy'][i]
+    fill.location = params['light_loc'][i]
 
 
 def import_model(path):
@@ -144,66 +287,204 @@ def import_model(path):
     return bpy.context.selected_objects
 
 
-def randomise_object(obj):
-    """Randomize object scale, rotation, and position."""
-    obj.scale = (random.uniform(SCALE_MIN, SCALE_MAX),) * 3
-    obj.rotation_euler = (random.uniform(0, 2 * math.pi),) * 3
-    obj.location = (
-        random.uniform(POS_X_MIN, POS_X_MAX),
-        random.uniform(POS_Y_MIN, POS_Y_MAX),
-        0
-    )
+def local_hull_points(obj):
+    """Return the convex-hull vertices (K×3) of the object's evaluated mesh in local space.
 
+    A projected mesh has the same 2-D bounding box as its projected convex
+    hull, so projecting these K ≪ V points per frame still gives tight labels.
+    """
+    dg = bpy.context.evaluated_depsgraph_get()
+    evaluated_obj = obj.evaluated_get(dg)
 
-def randomise_camera(cam_obj):
-    """✅ UPDATED: Randomize camera position, rotation, and now zoom."""
+    # Without modifiers or shape keys the evaluated mesh is just the object's
+    # own data, so read it directly instead of building a to_mesh() copy
+    shape_keys = obj.data.shape_keys
+    needs_copy = bool(obj.modifiers) or bool(shape_keys and shape_keys.key_blocks)
+    mesh = evaluated_obj.to_mesh() if needs_copy else evaluated_obj.data
+
+    n = len(mesh.vertices)
+    if not n:
+        if needs_copy:
+            evaluated_obj.to_mesh_clear()
+        return None
+
+    # Bulk-copy vertex coordinates into NumPy instead of iterating in Python
+    buf = np.empty(n * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', buf)
+    verts = buf.reshape(n, 3).astype(np.float64)
+
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    if needs_copy:
+        evaluated_obj.to_mesh_clear()
+    bm.verts.index_update()
+    hull = set()
+    try:
+        res = bmesh.ops.convex_hull(bm, input=bm.verts[:])
+        for ele in res['geom']:
+            if isinstance(ele, bmesh.types.BMVert):
+                hull.add(ele.index)
+            elif isinstance(ele, bmesh.types.BMFace):
+                hull.update(v.index for v in ele.verts)
+    except RuntimeError:
+        pass
+    finally:
+        bm.free()
+
+    # Flat / degenerate meshes have no 3-D hull; fall back to every vertex
+    if len(hull) < 4:
+        return verts
+    return verts[sorted(hull)]
+
+
+@lru_cache(maxsize=None)
+def load_model_once(path):
+    """Import a model the first time it is picked.
+
+    Returns (mesh name, local hull points, names of every imported object);
+    the whole group starts hidden. Repeat calls for the same path are a cache
+    lookup instead of a glTF re-parse. Returns None if the file has no usable mesh.
+    """
+    imported = import_model(path)
+    group = tuple(o.name for o in imported)
+    # ✅ FIXED: Find the actual MESH object from the import, not just the first object.
+    # This handles cases where the glb/gltf has a parent "Empty" object.
+    obj = next((o for o in imported if o.type == 'MESH'), None)
+    hull = local_hull_points(obj) if obj is not None else None
+
+    # Hide everything the import created (extra meshes, child meshes under
+    # the root Empty, ...) so it never leaks into another model's frames
+    set_group_visible(group, False)
+    if obj is None:
+        print(f"ERROR: No MESH object found in {path}. Skipping this model.")
+        return None
+    if hull is None:
+        print(f"ERROR: Mesh in {path} has no vertices. Skipping this model.")
+        return None
+    return obj.name, hull, group
+
+
+def set_visible(obj, visible):
+    """Show or hide an object in both the viewport and the render."""
+    obj.hide_render = not visible
+    obj.hide_viewport = not visible
+
+
+def set_group_visible(names, visible):
+    """Show or hide every object of one imported model."""
+    for name in names:
+        set_visible(bpy.data.objects[name], visible)
+
+
+def sample_frame_params(rng, n):
+    """Draw the randomisation for n frames up front: one array per parameter, one row per frame."""
+    zeros = np.zeros(n)
+
+    # Camera position in spherical coordinates
+    r = rng.uniform(CAM_RAD_MIN, CAM_RAD_MAX, n)
+    elev = np.radians(rng.uniform(CAM_ELEV_MIN, CAM_ELEV_MAX, n))
+    azim = rng.uniform(0, 2 * math.pi, n)
+
+    return {
+        'scale': rng.uniform(SCALE_MIN, SCALE_MAX, n),
+        'rot': rng.uniform(0, 2 * math.pi, n),
+        'obj_loc': np.stack([
+            rng.uniform(POS_X_MIN, POS_X_MAX, n),
+            rng.uniform(POS_Y_MIN, POS_Y_MAX, n),
+            zeros,
+        ], axis=1),
+        'focal': rng.uniform(FOCAL_MIN, FOCAL_MAX, n),
+        'cam_loc': np.stack([
+            r * np.cos(azim) * np.cos(elev),
+            r * np.sin(azim) * np.cos(elev),
+            r * np.sin(elev),
+        ], axis=1),
+        # Camera aims near the center of the random object placement area
+        'cam_target': np.stack([
+            rng.uniform(POS_X_MIN, POS_X_MAX, n) / 2,
+            rng.uniform(POS_Y_MIN, POS_Y_MAX, n) / 2,
+            zeros,
+        ], axis=1),
+        'light_energy': rng.uniform(LIGHT_PWR_MIN, LIGHT_PWR_MAX, n),
+        'light_loc': rng.uniform((-4, -4, 1), (4, 4, 4), (n, 3)),
+    }
+
+
+def randomise_object(obj, params, i):
+    """Apply frame i's object scale, rotation, and position."""
+    obj.scale = (params['scale'][i],) * 3
+    obj.rotation_euler = (params['rot'][i],) * 3
+    obj.location = params['obj_loc'][i]
+
+
+def randomise_camera(cam_obj, params, i):
+    """✅ UPDATED: Apply frame i's camera position, rotation, and zoom."""
     # Set camera zoom (focal length)
-    cam_obj.data.lens = random.uniform(FOCAL_MIN, FOCAL_MAX)
+    cam_obj.data.lens = params['focal'][i]
 
-    # Set camera position using spherical coordinates
-    r = random.uniform(CAM_RAD_MIN, CAM_RAD_MAX)
-    elev = math.radians(random.uniform(CAM_ELEV_MIN, CAM_ELEV_MAX))
-    azim = random.uniform(0, 2 * math.pi)
-    
-    cam_obj.location = (
-        r * math.cos(azim) * math.cos(elev),
-        r * math.sin(azim) * math.cos(elev),
-        r * math.sin(elev)
-    )
-
-    # Point camera towards the center of the random object placement area
-    target_pos = Vector((
-        random.uniform(POS_X_MIN, POS_X_MAX) / 2,
-        random.uniform(POS_Y_MIN, POS_Y_MAX) / 2,
-        0
-    ))
-    direction = target_pos - cam_obj.location
+    cam_obj.location = params['cam_loc'][i]
+
+    # Point camera towards the frame's target
+    direction = Vector(params['cam_target'][i]) - cam_obj.location
     rot_quat = direction.to_track_quat('-Z', 'Y')
     cam_obj.rotation_euler = rot_quat.to_euler()
 
 
-def calc_yolo_bbox(obj, cam):
-    """Calculate the YOLO-formatted bounding box of an object."""
-    scene = bpy.context.scene
-    dg = bpy.context.evaluated_depsgraph_get()
-    evaluated_obj = obj.evaluated_get(dg)
+def world_matrix(obj):
+    """Return obj's world matrix from its current transform, without a depsgraph update.
 
-    mesh = evaluated_obj.to_mesh()
-    if not mesh.vertices:
-        evaluated_obj.to_mesh_clear()
-        return None
+    matrix_basis is rebuilt from location / rotation / scale on access, unlike
+    matrix_world which is only refreshed when the depsgraph is evaluated.
+    """
+    if obj.parent is None:
+        return obj.matrix_basis
+    return obj.parent.matrix_world @ obj.matrix_parent_inverse @ obj.matrix_basis
 
-    coords_3d = [evaluated_obj.matrix_world @ v.co for v in mesh.vertices]
-    coords_2d = [world_to_camera_view(scene, cam, p) for p in coords_3d]
-    evaluated_obj.to_mesh_clear()
 
-    visible_coords = [c for c in coords_2d if 0.0 <= c.x <= 1.0 and 0.0 <= c.y <= 1.0 and c.z > 0]
-    if not visible_coords:
-        return None
+def camera_projection(cam):
+    """Return (world → camera matrix, frame bounds at unit depth) for a perspective camera.
+
+    Reads the camera's current transform and lens directly, so it is valid
+    right after randomise_camera() without flushing the depsgraph.
+    """
+    view = np.array(world_matrix(cam).normalized().inverted())
+    # Frame corners at depth -frame[0].z, same corner order world_to_camera_view uses
+    frame = cam.data.view_frame(scene=bpy.context.scene)
+    depth = -frame[0].z
+    bounds = (frame[2].x / depth, frame[1].x / depth, frame[1].y / depth, frame[0].y / depth)
+    return view, bounds
+
+
+def calc_yolo_bbox(obj, hull, proj):
+    """Calculate the YOLO-formatted bounding box of an object.
+
+    Only the precomputed convex-hull points from local_hull_points() are
+    projected; `proj` is the frame's camera projection from camera_projection().
+    """
+    M = np.array(world_matrix(obj))
+    world = hull @ M[:3, :3].T + M[:3, 3]
 
-    xs, ys = zip(*[(c.x, c.y) for c in visible_coords])
-    xmin, xmax = min(xs), max(xs)
-    ymin, ymax = min(ys), max(ys)
+    # Same maths as world_to_camera_view, done once for all hull points
+    view, (x0, x1, y0, y1) = proj
+    local = world @ view[:3, :3].T + view[:3, 3]
+    z = -local[:, 2]
+
+    # Like the per-vertex version, ignore points behind the camera
+    in_front = z > 0
+    if not np.any(in_front):
+        return None
+    local, z = local[in_front], z[in_front]
+    coords_2d = np.stack([
+        (local[:, 0] / z - x0) / (x1 - x0),
+        (local[:, 1] / z - y0) / (y1 - y0),
+    ], axis=1)
+
+    # Clip to the frame; nothing left means the object is off-screen
+    xmin, ymin = np.clip(coords_2d.min(axis=0), 0.0, 1.0)
+    xmax, ymax = np.clip(coords_2d.max(axis=0), 0.0, 1.0)
+    if xmax <= xmin or ymax <= ymin:
+        return None
+    xmin, xmax, ymin, ymax = float(xmin), float(xmax), float(ymin), float(ymax)
 
     cx = (xmin + xmax) / 2
     cy = 1 - ((ymin + ymax) / 2)
@@ -215,6 +496,22 @@ def calc_yolo_bbox(obj, cam):
         bbox_vals[i] = min(max(bbox_vals[i], 0.0), 1.0)
 
     return f"{CLASS_ID} {bbox_vals[0]:.6f} {bbox_vals[1]:.6f} {bbox_vals[2]:.6f} {bbox_vals[3]:.6f}"
+
+
+def save_frame_with_blender(path):
+    """Write the last composited frame with Blender's encoder and the scene's image settings."""
+    bpy.data.images['Viewer Node'].save_render(path, scene=bpy.context.scene)
+
+
+def read_frame_pixels():
+    """Copy the last composited frame out of the Viewer node as float RGBA."""
+    img = bpy.data.images['Viewer Node']
+    w, h = img.size
+    buf = np.empty(w * h * 4, dtype=np.float32)
+    img.pixels.foreach_get(buf)
+    return buf.reshape(h, w, 4)
+
+
 # ────────────────────────────────────────────────────────────────────────────
 # Main generation loop
 # ────────────────────────────────────────────────────────────────────────────
@@ -222,6 +519,24 @@ def calc_yolo_bbox(obj, cam):
 def main():
     if not MODELS:
         raise RuntimeError('MODELS list is empty. Set valid paths at top of script.')
+    # Blender doesn't bundle Pillow; by default fall back to PNG, which the
+    # writer pool can encode without it
+    output_format = OUTPUT_FORMAT or ('JPEG' if frame_writer.Image is not None else 'PNG')
+    if output_format not in {'JPEG', 'PNG'}:
+        raise RuntimeError(f'Unsupported OUTPUT_FORMAT: {OUTPUT_FORMAT}')
+    blender_jpeg = output_format == 'JPEG' and frame_writer.Image is None
+    if blender_jpeg:
+        print("Pillow not found in Blender's Python — writing JPEGs with Blender's "
+              "encoder on the main thread (slow). Install Pillow or use PNG.")
+    img_ext = '.jpg' if output_format == 'JPEG' else '.png'
+
+    # Each shard renders a disjoint slice of the global image indices
+    shard, total, engine = parse_cli_args()
+    start = shard * NUM_IMAGES // total
+    end = (shard + 1) * NUM_IMAGES // total
+    num_to_render = end - start
+    # Every random draw in the run comes from this generator
+    rng = np.random.default_rng(None if SEED is None else [SEED, shard])
     
     background_files = [os.path.join(BACKGROUNDS_DIR, f) for f in os.listdir(BACKGROUNDS_DIR) 
                         if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
@@ -233,60 +548,106 @@ def main():
     os.makedirs(img_dir, exist_ok=True)
     os.makedirs(lbl_dir, exist_ok=True)
 
-    setup_renderer()
+    setup_renderer(engine)
     cam = ensure_camera()
+    fill = setup_lights(rng)
     bg_image_node = setup_compositor()
+    bg_images = load_backgrounds(background_files)
 
-    rendered = 0
-    frame_num = 0
-    while rendered < NUM_IMAGES:
-        clean_scene()
-        
-        imported_objs = import_model(random.choice(MODELS))
-        
-        # ✅ FIXED: Find the actual MESH object from the import, not just the first object.
-        # This handles cases where the glb/gltf has a parent "Empty" object.
-        obj = None
-        for o in imported_objs:
-            if o.type == 'MESH':
-                obj = o
-                break # Found it, stop looking
-        
-        # If no mesh was found in the imported file, skip this iteration.
-        if obj is None:
-            frame_num += 1
-            print(f"ERROR: No MESH object found in the imported model. Skipping frame {frame_num}.")
-            continue
-
-        # Now, proceed with the correctly identified mesh object
-        randomise_object(obj)
-        randomise_camera(cam)
-        ensure_light()
-        
-        bg_image_node.image = bpy.data.images.load(random.choice(background_files))
-        bpy.context.view_layer.update()
-
-        bbox = calc_yolo_bbox(obj, cam)
-        if bbox is None:
-            frame_num += 1
-            print(f'Object not visible in frame {frame_num}, trying new randomisation.')
-            bpy.data.images.remove(bg_image_node.image)
-            continue
+    # Each model is imported once (see load_model_once); per frame only its
+    # visibility and transform change
+    clean_scene()
+    model_paths = list(MODELS)
 
-        base_filename = f'synth_{frame_num:05d}'
-        bpy.context.scene.render.filepath = os.path.join(img_dir, f'{base_filename}.png')
-        bpy.ops.render.render(write_still=True)
+    # Writer threads only run frame_writer code (NumPy / zlib / Pillow), never bpy
+    writer = ThreadPoolExecutor(WRITER_WORKERS)
+    pending = deque()
+    labels = []
 
-        with open(os.path.join(lbl_dir, f'{base_filename}.txt'), 'w') as f:
-            f.write(bbox + '\n')
-            
-        bpy.data.images.remove(bg_image_node.image)
+    # Randomisation is drawn in batches; each attempt (rendered or rejected) uses one row
+    batch = max(num_to_render, 1)
 
-        rendered += 1
-        frame_num += 1
-        print(f'Rendered {rendered}/{NUM_IMAGES} -> {base_filename}.png')
+    # Visibility changes tag a depsgraph relations update, so only toggle
+    # them when a different model is picked
+    visible_group = None
 
-    print(f'\n✅ DONE — Synthetic dataset with {NUM_IMAGES} images stored in {OUTPUT_DIR}')
+    rendered = 0
+    frame_num = 0
+    try:
+        while rendered < num_to_render:
+            i = frame_num % batch
+            if i == 0:
+                params = sample_frame_params(rng, batch)
+
+            path = model_paths[rng.integers(len(model_paths))]
+            model = load_model_once(path)
+            if model is None:
+                model_paths.remove(path)
+                if not model_paths:
+                    raise RuntimeError('None of the MODELS contain a usable MESH object.')
+                continue
+            mesh_name, hull, group = model
+            obj = bpy.data.objects[mesh_name]
+            if group != visible_group:
+                if visible_group is not None:
+                    set_group_visible(visible_group, False)
+                set_group_visible(group, True)
+                visible_group = group
+
+            randomise_object(obj, params, i)
+            randomise_camera(cam, params, i)
+            randomise_light(fill, params, i)
+            
+            bg_image_node.image = bg_images[rng.integers(len(bg_images))]
+
+            # No view_layer.update() needed: the bbox maths reads transforms
+            # directly and render() evaluates the depsgraph itself
+            proj = camera_projection(cam)
+            bbox = calc_yolo_bbox(obj, hull, proj)
+            if bbox is None:
+                frame_num += 1
+                print(f'Object not visible in frame {frame_num}, trying new randomisation.')
+                continue
+
+            base_filename = f'synth_{start + rendered:05d}'
+            bpy.ops.render.render()
+
+            # Record the label before the image write can raise
+            labels.append((base_filename, bbox))
+            img_path = os.path.join(img_dir, base_filename + img_ext)
+            if blender_jpeg:
+                save_frame_with_blender(img_path)
+            else:
+                # Rendering stays on the main thread; encoding and disk IO overlap
+                # with the next frame's randomisation.
+                pending.append(writer.submit(
+                    frame_writer.save_frame,
+                    read_frame_pixels(),
+                    img_path,
+                    output_format,
+                    JPEG_QUALITY,
+                    PNG_ZLIB_LEVEL,
+                ))
+                while len(pending) > MAX_PENDING_WRITES:
+                    pending.popleft().result()
+
+            if len(labels) >= LABEL_FLUSH_EVERY:
+                pending.append(writer.submit(frame_writer.write_labels, lbl_dir, labels))
+                labels = []
+
+            rendered += 1
+            frame_num += 1
+            print(f'[shard {shard}/{total}] Rendered {rendered}/{num_to_render} -> {base_filename}{img_ext}')
+    finally:
+        # Flush even on Ctrl-C or errors so no written image is left without its
+        # label (YOLO would silently treat it as a pure-background negative)
+        if labels:
+            frame_writer.write_labels(lbl_dir, labels)
+        writer.shutdown()
+    for fut in pending:
+        fut.result()
+
+    print(f'\n✅ DONE — Shard {shard}/{total} wrote images {start}–{end - 1} to {OUTPUT_DIR}')
 
 
 if __name__ == '__main__':
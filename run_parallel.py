@@ -0,0 +1,49 @@
+"""
+run_parallel.py — Launch one headless Blender per GPU, each rendering a shard
+-----------------------------------------------------------------------------
+Every process runs generate_blender.py with `--shard i --total N` and writes
+disjoint synth_XXXXX indices into the same OUTPUT_DIR. Shards are forced onto
+Cycles, because only Cycles honours CUDA_VISIBLE_DEVICES. That way each
+process sees and renders on its own GPU only; Eevee would put every shard on
+the display GPU.
+
+HOW TO RUN:
+  python run_parallel.py            # one shard per GPU in NUM_GPUS
+  python run_parallel.py 2          # override the number of shards
+"""
+
+import os
+import subprocess
+import sys
+
+# ────────────────────────────────────────────────────────────────────────────
+# CONFIG
+# ────────────────────────────────────────────────────────────────────────────
+BLENDER_BIN = "blender"
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generate_blender.py")
+NUM_GPUS = 4
+# ----------------------------------------------------------------------------
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_GPUS
+
+    procs = []
+    for i in range(n):
+        env = os.environ.copy()
+        env['CUDA_VISIBLE_DEVICES'] = str(i)
+        procs.append(subprocess.Popen(
+            # Blender exits 0 when a --python script raises unless told otherwise
+            [BLENDER_BIN, '--background', '--python-exit-code', '1', '--python', SCRIPT,
+             '--', '--shard', str(i), '--total', str(n), '--engine', 'CYCLES'],
+            env=env,
+        ))
+
+    failed = [i for i, p in enumerate(procs) if p.wait() != 0]
+    if failed:
+        raise SystemExit(f'❌ Shards failed: {failed}')
+    print(f'\n✅ DONE — all {n} shards finished')
+
+
+if __name__ == '__main__':
+    main()